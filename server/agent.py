@@ -5,7 +5,7 @@ from langchain.agents import AgentExecutor, create_openai_functions_agent
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.tools import tool
 from langchain_core.messages import HumanMessage, AIMessage
-from typing import List
+from typing import List, Optional
 import json
 from datetime import datetime
 
@@ -15,6 +15,7 @@ from server.tools import (
     restock_book,
     update_price,
     order_status,
+    customer_order_history,
     inventory_summary
 )
 from server.models import Message, ToolCall
@@ -161,16 +162,59 @@ async def run_agent(session_id: str, user_message: str, db: AsyncSession) -> str
         return result
 
     @tool
-    async def order_status_tool(order_id: int) -> dict:
-        """Get the status of an order by order ID."""
-        status = await order_status(db=db, order_id=order_id)
-        result = status
+    async def order_status_tool(order_ids: List[int]) -> dict:
+        """
+        Get the status, items (with titles) and totals of one or more orders by their order IDs.
+        
+        Orders are returned in the same order as order_ids; unknown IDs are listed in 'not_found'.
+        """
+        result = await order_status(db=db, order_ids=order_ids)
         
         # Log tool call
         tool_call = ToolCall(
             session_id=session_id,
             name="order_status",
-            args_json=json.dumps({"order_id": order_id}),
+            args_json=json.dumps({"order_ids": order_ids}),
+            result_json=json.dumps(result),
+            created_at=datetime.utcnow()
+        )
+        db.add(tool_call)
+        await db.commit()
+        
+        return result
+
+    @tool
+    async def customer_order_history_tool(
+        customer_id: int,
+        limit: int = 10,
+        before_created_at: Optional[str] = None,
+        before_id: Optional[int] = None
+    ) -> dict:
+        """
+        Get all orders of a customer, newest first, with items, titles and totals.
+        
+        Results are paginated. If 'next_cursor' is not null, call again with its
+        'before_created_at' and 'before_id' values to fetch the next page.
+        If the result contains 'error', fix the arguments and try again.
+        """
+        result = await customer_order_history(
+            db=db,
+            customer_id=customer_id,
+            limit=limit,
+            before_created_at=before_created_at,
+            before_id=before_id
+        )
+        
+        # Log tool call
+        tool_call = ToolCall(
+            session_id=session_id,
+            name="customer_order_history",
+            args_json=json.dumps({
+                "customer_id": customer_id,
+                "limit": limit,
+                "before_created_at": before_created_at,
+                "before_id": before_id
+            }),
             result_json=json.dumps(result),
             created_at=datetime.utcnow()
         )
@@ -205,6 +249,7 @@ async def run_agent(session_id: str, user_message: str, db: AsyncSession) -> str
         restock_book_tool,
         update_price_tool,
         order_status_tool,
+        customer_order_history_tool,
         inventory_summary_tool
     ]
 
@@ -217,7 +262,8 @@ async def run_agent(session_id: str, user_message: str, db: AsyncSession) -> str
 - Creating orders for customers (specify customer_id and list of items with isbn and qty)
 - Restocking books
 - Updating book prices
-- Checking order status
+- Checking order status (one or several orders at once)
+- Listing a customer's order history
 - Getting inventory summaries
 
 CRITICAL RULES:
@@ -0,0 +1,80 @@
+from collections import OrderedDict
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+from server.config import MULTI_WORKER
+from server.models import DataVersion
+
+class ResultCache:
+    """
+    Process-local cache for read tool results (catalog data, inventory summaries).
+
+    Only enabled in multi-worker mode. With several uvicorn workers each process has its own
+    copy, so before every read the cache is synced against the shared data_version counter:
+    - PRAGMA data_version (per connection) only changes when ANOTHER connection commits,
+      so an unchanged value means nothing was written and the counter read is skipped
+    - Otherwise the counter is read, and if it moved, every cached entry is dropped
+    Writes from outside the app (scripts, manual SQL) must bump data_version.version too.
+    """
+
+    def __init__(self, enabled: bool = MULTI_WORKER, max_entries: int = 256):
+        self.enabled = enabled
+        self.max_entries = max_entries # Keys include free-text search queries: keep the dict bounded
+        self._entries: OrderedDict = OrderedDict() # Least recently used first
+        self._version: int | None = None # Counter value the entries were read at (None: unknown)
+        self.generation = 0 # Bumped on every clear, so a read that raced a write is not cached
+
+    async def sync(self, db: AsyncSession) -> None:
+        """Drop cached entries if another worker has written since they were cached."""
+        if not self.enabled:
+            return
+
+        conn = await db.connection()
+        data_version = (await conn.exec_driver_sql("PRAGMA data_version")).scalar()
+        # conn.info lives as long as the pooled DBAPI connection, like PRAGMA data_version itself
+        if self._version is not None and conn.info.get("data_version") == data_version:
+            return # Cheap path: no commits from other connections since the last check
+        conn.info["data_version"] = data_version
+
+        counter = await db.scalar(select(DataVersion.version).where(DataVersion.id == 1))
+        if counter is None:
+            raise RuntimeError("data_version row is missing; restart the server so init_db() recreates it")
+        if counter != self._version:
+            self._clear()
+            self._version = counter
+
+    def get(self, key):
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def set(self, key, value, generation: int) -> None:
+        """Store value unless the cache was cleared after the read started (generation changed)."""
+        if not self.enabled or generation != self.generation:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False) # Evict the least recently used entry
+
+    def invalidate(self) -> None:
+        """Drop all entries after a local write; the next sync() re-reads the counter."""
+        self._clear()
+        self._version = None
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self.generation += 1
+
+
+cache = ResultCache()
+
+async def bump_data_version(db: AsyncSession) -> None:
+    """Increase the shared counter inside the current write transaction (commit is up to the caller)."""
+    result = await db.execute(
+        update(DataVersion)
+        .where(DataVersion.id == 1)
+        .values(version=DataVersion.version + 1)
+    )
+    if result.rowcount != 1:
+        raise RuntimeError("data_version row is missing; restart the server so init_db() recreates it")
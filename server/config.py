@@ -13,3 +13,6 @@ DATABASE_URL = os.getenv(
     "DATABASE_URL",
     "sqlite+aiosqlite:///./library.db"
 ) # Default: sqlite+aiosqlite:///./library.db
+
+# Deployment
+MULTI_WORKER = os.getenv("MULTI_WORKER", "false").lower() == "true" # Default: false (single uvicorn worker)
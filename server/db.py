@@ -1,10 +1,23 @@
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from server.config import DATABASE_URL
+from server.config import DATABASE_URL, MULTI_WORKER
+from server.models import Base, DataVersion
 
 # Create async engine
 engine = create_async_engine(DATABASE_URL, echo=False)
 
+# Several uvicorn workers share one SQLite file: WAL lets readers run while another process writes,
+# busy_timeout makes writers wait for the lock instead of failing with "database is locked"
+if MULTI_WORKER and DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
 # Async session factory
 AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
@@ -12,3 +25,17 @@ AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_com
 async def get_db() -> AsyncSession:
     async with AsyncSessionLocal() as session: # Automatically manages the session lifecycle (open, close)
         yield session
+
+def _create_missing_schema(sync_conn) -> None:
+    Base.metadata.create_all(sync_conn) # checkfirst: only tables that don't exist yet, data is kept
+    # create_all only indexes the tables it creates, so add indexes introduced later to existing tables
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True) # CREATE INDEX only if missing
+
+# Called once at app startup: brings an existing library.db up to date without re-seeding
+async def init_db() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(_create_missing_schema)
+        # INSERT OR IGNORE: the shared counter row must exist before any write tool bumps it
+        await conn.execute(insert(DataVersion).values(id=1, version=0).on_conflict_do_nothing())
@@ -0,0 +1,156 @@
+"""
+Multi-process load test for multi-worker mode (MULTI_WORKER=true).
+
+Starts several worker processes on one temporary SQLite file. Each worker warms its
+find_books / inventory_summary cache, then in every round one worker restocks the book
+or changes its price and all workers must read the new value (no stale cache entries).
+A final phase restocks concurrently from every worker to check that no update is lost.
+
+Usage (from the project root):
+    python -m server.load_test [--workers 4] [--rounds 20] [--restocks 25]
+"""
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+
+ISBN = "9780132350884"
+TITLE = "Clean Code"
+INITIAL_STOCK = 10
+INITIAL_PRICE = 35.99
+LOW_STOCK_THRESHOLD = 10_000 # High enough that inventory_summary always lists the book
+
+def expected_after(round_no: int) -> tuple[int, float]:
+    """(stock, price) once rounds 0..round_no are done: even rounds restock by 1, odd rounds set a new price."""
+    restocks = sum(1 for r in range(round_no + 1) if r % 2 == 0)
+    last_price_round = max((r for r in range(round_no + 1) if r % 2 == 1), default=None)
+    price = INITIAL_PRICE if last_price_round is None else round(20 + last_price_round * 0.5, 2)
+    return INITIAL_STOCK + restocks, price
+
+def _configure_env(db_path: str) -> None:
+    # Must run before any server.* import: config reads the environment at import time
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+    os.environ["MULTI_WORKER"] = "true"
+
+
+async def _setup(db_path: str) -> None:
+    from server.db import AsyncSessionLocal, engine, init_db
+    from server.models import Book, Customer
+
+    await init_db()
+    async with AsyncSessionLocal() as session:
+        session.add(Book(isbn=ISBN, title=TITLE, author="Robert C. Martin", stock=INITIAL_STOCK, price=INITIAL_PRICE))
+        session.add(Customer(id=1, name="Alice Johnson", email="alice@example.com"))
+        await session.commit()
+    await engine.dispose()
+
+
+async def _read(AsyncSessionLocal, find_books, inventory_summary) -> list[tuple[str, int, float]]:
+    """Read the book through both cached tools, one session per read like one chat request."""
+    async with AsyncSessionLocal() as db:
+        found = (await find_books(db, q=TITLE, by="title"))[0]
+        summary = [b for b in await inventory_summary(db, low_stock_threshold=LOW_STOCK_THRESHOLD) if b["isbn"] == ISBN][0]
+    return [
+        ("find_books", found["stock"], found["price"]),
+        ("inventory_summary", summary["stock"], summary["price"])
+    ]
+
+
+async def _worker_main(worker_id: int, workers: int, rounds: int, restocks: int, barrier, errors) -> None:
+    from server.cache import cache
+    from server.db import AsyncSessionLocal, engine
+    from server.tools import find_books, inventory_summary, restock_book, update_price
+
+    def wait():
+        barrier.wait(timeout=60)
+
+    # Warm the cache and check it is actually serving hits
+    await _read(AsyncSessionLocal, find_books, inventory_summary)
+    if not cache.get(("find_books", TITLE.lower(), "title")):
+        errors.put(f"worker {worker_id}: find_books result was not cached")
+    wait()
+
+    for round_no in range(rounds):
+        if round_no % workers == worker_id:
+            async with AsyncSessionLocal() as db:
+                if round_no % 2 == 0:
+                    await restock_book(db, isbn=ISBN, qty=1)
+                else:
+                    await update_price(db, isbn=ISBN, price=expected_after(round_no)[1])
+        wait() # Write committed before anyone reads
+
+        stock, price = expected_after(round_no)
+        for tool_name, got_stock, got_price in await _read(AsyncSessionLocal, find_books, inventory_summary):
+            if (got_stock, got_price) != (stock, price):
+                errors.put(
+                    f"worker {worker_id} round {round_no}: stale {tool_name} "
+                    f"stock={got_stock} price={got_price}, expected stock={stock} price={price}"
+                )
+        wait() # Everyone has read before the next write
+
+    # Concurrent restocks from every worker: SQL-side increments must not lose updates
+    for _ in range(restocks):
+        async with AsyncSessionLocal() as db:
+            await restock_book(db, isbn=ISBN, qty=1)
+    wait()
+
+    stock = expected_after(rounds - 1)[0] + workers * restocks
+    for tool_name, got_stock, _ in await _read(AsyncSessionLocal, find_books, inventory_summary):
+        if got_stock != stock:
+            errors.put(f"worker {worker_id}: {tool_name} stock={got_stock} after concurrent restocks, expected {stock}")
+
+    await engine.dispose()
+
+
+def _worker(db_path: str, worker_id: int, workers: int, rounds: int, restocks: int, barrier, errors) -> None:
+    _configure_env(db_path)
+    try:
+        asyncio.run(_worker_main(worker_id, workers, rounds, restocks, barrier, errors))
+    except Exception as e:
+        errors.put(f"worker {worker_id}: {type(e).__name__}: {e}")
+        barrier.abort() # Release the other workers instead of leaving them waiting
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Multi-worker cache coherence load test")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--restocks", type=int, default=25, help="Concurrent restocks per worker in the final phase")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "load_test.db")
+        _configure_env(db_path)
+        asyncio.run(_setup(db_path))
+
+        ctx = mp.get_context("spawn") # Fresh interpreters: each worker has its own engine and cache
+        barrier = ctx.Barrier(args.workers)
+        errors = ctx.Queue()
+        processes = [
+            ctx.Process(target=_worker, args=(db_path, i, args.workers, args.rounds, args.restocks, barrier, errors))
+            for i in range(args.workers)
+        ]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
+
+        failures = []
+        while not errors.empty():
+            failures.append(errors.get())
+        failures += [f"worker {i} exited with code {p.exitcode}" for i, p in enumerate(processes) if p.exitcode != 0]
+
+    if failures:
+        print(f"FAILED ({len(failures)} problems):")
+        for failure in failures:
+            print(" -", failure)
+        return 1
+
+    print(f"OK: {args.workers} workers, {args.rounds} rounds, {args.workers * args.restocks} concurrent restocks, no stale reads")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
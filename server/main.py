@@ -1,11 +1,18 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession
-from server.db import get_db
+from server.db import get_db, init_db
 from server.agent import run_agent
 from server.schemas import ChatRequest
 
-app = FastAPI(title="Library Desk Agent")
+# Runs once per worker before serving requests
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_db()
+    yield
+
+app = FastAPI(title="Library Desk Agent", lifespan=lifespan)
 
 # Add CORS to allow any website to call my API
 app.add_middleware(
@@ -52,8 +52,8 @@ class Order(Base):
     __tablename__ = "orders"
 
     id = Column(Integer, primary_key=True, index=True)
-    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False, index=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow) # Part of the order history keyset
     status = Column(String, default="created")
 
     # Allow to access customers from orders: orders.customers
@@ -66,7 +66,7 @@ class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
     isbn = Column(String, ForeignKey("books.isbn"), nullable=False)
     qty = Column(Integer, nullable=False)
     price = Column(Float, nullable=False)
@@ -77,6 +77,17 @@ class OrderItem(Base):
     book = relationship("Book", back_populates="order_items")
 
 
+# -------------------------
+# Data version (multi-worker cache coherence)
+# -------------------------
+
+class DataVersion(Base):
+    __tablename__ = "data_version"
+
+    id = Column(Integer, primary_key=True)  # Single row: id = 1
+    version = Column(Integer, nullable=False, default=0)  # Bumped on every catalog/order write
+
+
 # -------------------------
 # Chat storage
 # -------------------------
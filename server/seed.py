@@ -1,7 +1,7 @@
 import asyncio
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from models import Base, Book, Customer, Order, OrderItem
+from models import Base, Book, Customer, Order, OrderItem, DataVersion
 from sqlalchemy import text
 from config import DATABASE_URL
 
@@ -68,6 +68,9 @@ async def seed_database():
         ]
         session.add_all(order_items)
         
+        # Shared data-version counter used by workers to invalidate their caches
+        session.add(DataVersion(id=1, version=0))
+        
         # Save everything
         await session.commit()
         
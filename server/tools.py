@@ -1,20 +1,31 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.orm import selectinload
+from datetime import datetime
 from server.models import Book, Order, OrderItem, Customer
+from server.cache import cache, bump_data_version
 
 async def find_books(db: AsyncSession, q: str, by: str = "title") -> list[dict]:
     """Find books by title or author."""
+    if by not in ("title", "author"):
+        raise ValueError("by parameter must be 'title' or 'author'")
+
+    await cache.sync(db) # Drop stale entries if another worker changed the data
+    key = ("find_books", q.lower(), by)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    generation = cache.generation
+
     query = select(Book) # Start with: SELECT * FROM books
     if by == "title":
         query = query.where(Book.title.ilike(f"%{q}%")) # ilike  case-insensitive LIKE
     elif by == "author":
         query = query.where(Book.author.ilike(f"%{q}%")) # f"%{q}%" matches anywhere in the string
-    else:
-        raise ValueError("by parameter must be 'title' or 'author'")
     
     result = await db.execute(query)
     books = result.scalars().all()
-    return [
+    books = [
         {
             "isbn": b.isbn, 
             "title": b.title, 
@@ -23,6 +34,8 @@ async def find_books(db: AsyncSession, q: str, by: str = "title") -> list[dict]:
             "price": float(b.price)
         } for b in books
     ]
+    cache.set(key, books, generation)
+    return books
 
 async def create_order(db: AsyncSession, customer_id: int, items: list[dict]) -> int:
     """Create a new order and reduce stock."""
@@ -35,16 +48,28 @@ async def create_order(db: AsyncSession, customer_id: int, items: list[dict]) ->
     db.add(order)
     await db.flush()
     
+    books = []
     for item in items:
         book = await db.get(Book, item["isbn"])
         if not book:
             await db.rollback()
             raise ValueError(f"Book {item['isbn']} not found")
-        if book.stock < item["qty"]:
+        
+        # Conditional decrement in SQL: two workers can't both sell the last copies
+        result = await db.execute(
+            update(Book)
+            .where(Book.isbn == item["isbn"], Book.stock >= item["qty"])
+            .values(stock=Book.stock - item["qty"])
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            available = await db.scalar(select(Book.stock).where(Book.isbn == item["isbn"]))
+            # Build the message before rollback() expires book
+            message = f"Not enough stock for {book.title}. Available: {available}, Requested: {item['qty']}"
             await db.rollback()
-            raise ValueError(f"Not enough stock for {book.title}. Available: {book.stock}, Requested: {item['qty']}")
+            raise ValueError(message)
         
-        book.stock -= item["qty"]
+        books.append(book)
         order_item = OrderItem(
             order_id=order.id, 
             isbn=item["isbn"], 
@@ -53,7 +78,11 @@ async def create_order(db: AsyncSession, customer_id: int, items: list[dict]) ->
         )
         db.add(order_item)
     
+    await bump_data_version(db)
     await db.commit()
+    cache.invalidate()
+    for book in books:
+        await db.refresh(book) # Stock changed in SQL: reload the session's copy for later tool calls
     return order.id
 
 async def restock_book(db: AsyncSession, isbn: str, qty: int) -> dict:
@@ -62,15 +91,24 @@ async def restock_book(db: AsyncSession, isbn: str, qty: int) -> dict:
     if not book:
         raise ValueError(f"Book {isbn} not found")
     
-    old_stock = book.stock
-    book.stock += qty
+    # Increment in SQL: concurrent restocks from other workers can't be lost
+    new_stock = await db.scalar(
+        update(Book)
+        .where(Book.isbn == isbn)
+        .values(stock=Book.stock + qty)
+        .returning(Book.stock)
+        .execution_options(synchronize_session=False)
+    )
+    await bump_data_version(db)
     await db.commit()
+    cache.invalidate()
+    await db.refresh(book) # Reload the session's copy for later tool calls
     
     return {
         "isbn": isbn,
         "title": book.title,
-        "old_stock": old_stock,
-        "new_stock": book.stock,
+        "old_stock": new_stock - qty,
+        "new_stock": new_stock,
         "added": qty
     }
 
@@ -82,7 +120,9 @@ async def update_price(db: AsyncSession, isbn: str, price: float) -> dict:
     
     old_price = book.price
     book.price = price
+    await bump_data_version(db)
     await db.commit()
+    cache.invalidate()
     
     return {
         "isbn": isbn,
@@ -91,34 +131,106 @@ async def update_price(db: AsyncSession, isbn: str, price: float) -> dict:
         "new_price": float(price)
     }
 
-async def order_status(db: AsyncSession, order_id: int) -> dict:
-    """Get order status with details."""
-    order = await db.get(Order, order_id)
-    if not order:
-        return {"error": "Order not found"}
-    
-    # Get order items
-    result = await db.execute(
-        select(OrderItem).where(OrderItem.order_id == order_id)
-    )
-    items = result.scalars().all()
-    
+def _serialize_order(order: Order) -> dict:
+    """Convert an Order with eager-loaded items and books into a dict."""
+    items = [
+        {
+            "isbn": item.isbn,
+            "title": item.book.title if item.book else None,
+            "qty": item.qty,
+            "price": float(item.price) if item.price is not None else None,
+            "line_total": round(item.qty * float(item.price), 2) if item.price is not None else None
+        } for item in order.items
+    ]
     return {
         "order_id": order.id,
         "customer_id": order.customer_id,
         "status": order.status,
         "created_at": order.created_at.isoformat() if order.created_at else None,
-        "items": [
-            {
-                "isbn": item.isbn,
-                "qty": item.qty,
-                "price": float(item.price) if item.price else None
-            } for item in items
-        ]
+        "items": items,
+        "total": round(sum(i["line_total"] for i in items if i["line_total"] is not None), 2)
+    }
+
+def _orders_query():
+    """SELECT orders with their items and books loaded in one round trip per table."""
+    return (
+        select(Order)
+        .options(selectinload(Order.items).selectinload(OrderItem.book)) # Avoids N+1 lazy loads
+        .order_by(Order.created_at.desc(), Order.id.desc())
+    )
+
+async def order_status(db: AsyncSession, order_ids: list[int]) -> dict:
+    """Get status with details for one or more orders, returned in the order the IDs were given."""
+    result = await db.execute(_orders_query().where(Order.id.in_(order_ids)))
+    orders_by_id = {o.id: o for o in result.scalars().all()}
+
+    requested_ids = list(dict.fromkeys(order_ids)) # Keep caller order, drop duplicate IDs
+    return {
+        "orders": [_serialize_order(orders_by_id[i]) for i in requested_ids if i in orders_by_id],
+        "not_found": [i for i in requested_ids if i not in orders_by_id]
+    }
+
+async def customer_order_history(
+    db: AsyncSession,
+    customer_id: int,
+    limit: int = 10,
+    before_created_at: str | None = None,
+    before_id: int | None = None
+) -> dict:
+    """Get a customer's orders, newest first, with keyset pagination on (created_at, id)."""
+    # Arguments come from the LLM: return errors instead of raising so it can retry with fixed ones
+    if (before_created_at is None) != (before_id is None):
+        return {"error": "before_created_at and before_id must be given together (use next_cursor)"}
+    limit = max(1, min(limit, 50)) # Keep the page size sane
+
+    customer = await db.get(Customer, customer_id)
+    if not customer:
+        return {"error": f"Customer {customer_id} not found"}
+
+    query = _orders_query().where(Order.customer_id == customer_id)
+    if before_created_at is not None:
+        try:
+            cursor_ts = datetime.fromisoformat(before_created_at)
+        except ValueError:
+            return {"error": f"Invalid before_created_at '{before_created_at}', pass next_cursor values unchanged"}
+        # Keyset: rows strictly after the cursor in (created_at DESC, id DESC) order
+        query = query.where(
+            or_(
+                Order.created_at < cursor_ts,
+                and_(Order.created_at == cursor_ts, Order.id < before_id)
+            )
+        )
+
+    # Fetch one extra row to know whether another page exists
+    result = await db.execute(query.limit(limit + 1))
+    orders = result.scalars().all()
+    has_more = len(orders) > limit
+    orders = orders[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = orders[-1]
+        next_cursor = {
+            "before_created_at": last.created_at.isoformat(),
+            "before_id": last.id
+        }
+
+    return {
+        "customer_id": customer.id,
+        "customer_name": customer.name,
+        "orders": [_serialize_order(o) for o in orders],
+        "next_cursor": next_cursor
     }
 
 async def inventory_summary(db: AsyncSession, low_stock_threshold: int = 3) -> list[dict]:
     """Get stock summary of all books, highlighting low stock items."""
+    await cache.sync(db) # Drop stale entries if another worker changed the data
+    key = ("inventory_summary", low_stock_threshold)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    generation = cache.generation
+
     result = await db.execute(
         select(Book)
         .where(Book.stock <= low_stock_threshold)  # FILTER
@@ -126,7 +238,7 @@ async def inventory_summary(db: AsyncSession, low_stock_threshold: int = 3) -> l
     )
     books = result.scalars().all()
     
-    return [
+    summary = [
         {
             "isbn": b.isbn,
             "title": b.title,
@@ -135,4 +247,6 @@ async def inventory_summary(db: AsyncSession, low_stock_threshold: int = 3) -> l
             "price": float(b.price),
             "low_stock": True  # Now always True since we filtered
         } for b in books
-    ]
\ No newline at end of file
+    ]
+    cache.set(key, summary, generation)
+    return summary